@@ -1,84 +1,164 @@
-import json
 import sqlite3
 import csv
 import ast
+from itertools import chain
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson as _json
+except ImportError:  # stdlib fallback
+    import json as _json
+
+try:
+    import ijson
+except ImportError:  # load the whole file instead
+    ijson = None
+
+try:
+    from pyarrow import feather
+except ImportError:  # CSV fallback only
+    feather = None
+
 # ---------- paths ----------
 STATS_JSON_PATH = Path("data/nba_player_stats_2000_2025.json")
+MISSING_FEATHER_PATH = Path("data/nba_player_missing_seasons.feather")
 MISSING_CSV_PATH = Path("data/nba_player_missing_seasons.csv")
 DRAFT_JSON_PATH = Path("data/draft_history.json")
 DB_PATH = Path("data/nba_stats.db")
 
 
+# ---------- inserts ----------
+MISSING_INSERT_SQL = (
+    "INSERT INTO player_missing_seasons (player_name, seasons_json, missing_seasons_json) VALUES (?,?,?);"
+)
+
+# draft JSON keys in draft_history column order
+DRAFT_KEYS = (
+    "PERSON_ID", "PLAYER_NAME", "SEASON", "ROUND_NUMBER", "ROUND_PICK", "OVERALL_PICK", "DRAFT_TYPE",
+    "TEAM_ID", "TEAM_CITY", "TEAM_NAME", "TEAM_ABBREVIATION",
+    "ORGANIZATION", "ORGANIZATION_TYPE", "PLAYER_PROFILE_FLAG",
+)
+DRAFT_INSERT_SQL = """
+INSERT INTO draft_history (
+    person_id, player_name, season, round_number, round_pick, overall_pick, draft_type,
+    team_id, team_city, team_name, team_abbreviation,
+    organization, organization_type, player_profile_flag
+) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?);
+"""
+
+# player_season_stats columns in insert order; REAL columns are coerced to float
+STATS_COLUMNS = [
+    "PLAYER_ID", "PLAYER_NAME", "TEAM_ID", "TEAM_ABBREVIATION", "SEASON", "AGE",
+    "GP", "W", "L", "W_PCT", "MIN",
+    "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA",
+    "OREB", "DREB", "REB", "AST", "TOV", "STL", "BLK", "PF", "PTS", "PLUS_MINUS",
+]
+# every stats record must carry the insert columns; checked once against the first record
+REQUIRED_KEYS = frozenset(STATS_COLUMNS)
+FLOAT_COLUMNS = [
+    "AGE", "W_PCT", "MIN",
+    "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA",
+    "OREB", "DREB", "REB", "AST", "TOV", "STL", "BLK", "PF", "PTS", "PLUS_MINUS",
+]
+
+
 # ---------- helpers ----------
-def safe_float(x):
-    """Convert to float; return None if missing/invalid (becomes NULL in SQLite)."""
-    try:
-        return float(x)
-    except (TypeError, ValueError):
-        return None
+def to_float(col):
+    """Convert a column to a float array; missing/invalid become NaN (NULL in SQLite)."""
+    return pd.to_numeric(col, errors="coerce").to_numpy(dtype=float)
 
 
-def compute_metrics(r):
+def compute_metrics(df):
     """
-    Compute:
+    Compute, vectorized over every row of df (stat columns already float, see to_float):
       eFG% = (FGM + 0.5*FG3M) / FGA
       TS%  = PTS / (2*(FGA + 0.44*FTA))
       per-36 for PTS/REB/AST = stat * 36 / MIN
+    Undefined results (zero denominators, missing inputs) are NaN.
     """
-    min_ = safe_float(r.get("MIN"))
-    pts = safe_float(r.get("PTS"))
-    reb = safe_float(r.get("REB"))
-    ast_ = safe_float(r.get("AST"))
-
-    fgm = safe_float(r.get("FGM"))
-    fga = safe_float(r.get("FGA"))
-    fg3m = safe_float(r.get("FG3M"))
-    fta = safe_float(r.get("FTA"))
-
-    # eFG%
-    efg = None
-    if fga is not None and fga > 0 and fgm is not None and fg3m is not None:
-        efg = (fgm + 0.5 * fg3m) / fga
-
-    # TS%
-    ts = None
-    if pts is not None and fga is not None and fta is not None:
+    min_ = df["MIN"].to_numpy()
+    pts = df["PTS"].to_numpy()
+    reb = df["REB"].to_numpy()
+    ast_ = df["AST"].to_numpy()
+
+    fgm = df["FGM"].to_numpy()
+    fga = df["FGA"].to_numpy()
+    fg3m = df["FG3M"].to_numpy()
+    fta = df["FTA"].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # eFG%
+        efg = np.where(fga > 0, (fgm + 0.5 * fg3m) / fga, np.nan)
+
+        # TS%
         denom = 2 * (fga + 0.44 * fta)
-        if denom > 0:
-            ts = pts / denom
+        ts = np.where(denom > 0, pts / denom, np.nan)
+
+        # per-36
+        factor = np.where(min_ > 0, 36.0 / min_, np.nan)
+
+    return ts, efg, pts * factor, reb * factor, ast_ * factor
+
+
+def iter_json_records(path):
+    """Yield the objects of a top-level JSON array; streams with ijson when installed."""
+    if ijson is None:
+        yield from _json.loads(path.read_bytes())
+        return
+    with path.open("rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
 
-    # per-36
-    pts_36 = reb_36 = ast_36 = None
-    if min_ is not None and min_ > 0:
-        factor = 36.0 / min_
-        if pts is not None:
-            pts_36 = pts * factor
-        if reb is not None:
-            reb_36 = reb * factor
-        if ast_ is not None:
-            ast_36 = ast_ * factor
+def build_stats_frame(rows):
+    """Shape the raw JSON rows into player_season_stats columns (NaN stays NaN; to_sql writes NULL)."""
+    # keep only the insert columns of each record as it streams in
+    out = pd.DataFrame.from_records(
+        (tuple(r.get(k) for k in STATS_COLUMNS) for r in rows), columns=STATS_COLUMNS
+    )
+    # coerce each stat column once; the metrics reuse the same arrays
+    for col in FLOAT_COLUMNS:
+        out[col] = to_float(out[col])
+    ts, efg, p36, r36, a36 = compute_metrics(out)
 
-    return ts, efg, pts_36, reb_36, ast_36
+    out["TS_PCT"] = ts
+    out["EFG_PCT"] = efg
+    out["PTS_PER36"] = p36
+    out["REB_PER36"] = r36
+    out["AST_PER36"] = a36
+
+    out.columns = out.columns.str.lower()
+    return out
+
+
+def json_text(obj):
+    """Serialize to a JSON str for TEXT columns (orjson returns bytes)."""
+    out = _json.dumps(obj)
+    return out.decode() if isinstance(out, bytes) else out
 
 
 def parse_listish_cell(cell):
     """
     Your CSV columns look like: "['2011-12']" or "[]"
-    Use ast.literal_eval safely.
+    Fast path: swap the quotes and parse as JSON.
+    Fall back to ast.literal_eval (e.g. embedded apostrophes).
     Return python list.
     """
     if cell is None:
         return []
     cell = str(cell).strip()
-    if cell == "":
+    if cell == "" or cell == "[]":
         return []
     try:
-        val = ast.literal_eval(cell)
-        return val if isinstance(val, list) else []
-    except Exception:
-        return []
+        val = _json.loads(cell.replace("'", '"'))
+    except ValueError:
+        try:
+            val = ast.literal_eval(cell)
+        except Exception:
+            return []
+    return val if isinstance(val, list) else []
 
 
 # ---------- loaders ----------
@@ -115,7 +195,7 @@ def create_player_season_stats(cur):
         ast_per36 REAL,
 
         PRIMARY KEY (player_id, season)
-    );
+    ) WITHOUT ROWID;
     """)
 
 
@@ -123,69 +203,32 @@ def load_player_season_stats(cur):
     if not STATS_JSON_PATH.exists():
         raise FileNotFoundError(f"Missing input JSON: {STATS_JSON_PATH}")
 
-    rows = json.loads(STATS_JSON_PATH.read_text())
-    if not rows:
+    rows = iter_json_records(STATS_JSON_PATH)
+    first = next(rows, None)
+    if first is None:
         raise ValueError("Stats JSON file is empty.")
 
-    required_keys = {
-        "PLAYER_ID", "PLAYER_NAME", "TEAM_ID", "TEAM_ABBREVIATION", "SEASON",
-        "AGE", "GP", "MIN", "W", "L", "W_PCT",
-        "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA",
-        "OREB", "DREB", "REB", "AST", "TOV", "STL", "BLK", "PF", "PTS", "PLUS_MINUS",
-    }
-    missing = required_keys - set(rows[0].keys())
+    missing = REQUIRED_KEYS.difference(first)
     if missing:
         raise KeyError(f"Stats JSON missing required keys: {sorted(missing)}")
 
-    create_player_season_stats(cur)
-
-    insert_sql = """
-    INSERT INTO player_season_stats (
-        player_id, player_name, team_id, team_abbreviation, season, age,
-        gp, w, l, w_pct, min,
-        fgm, fga, fg3m, fg3a, ftm, fta,
-        oreb, dreb, reb, ast, tov, stl, blk, pf, pts, plus_minus,
-        ts_pct, efg_pct, pts_per36, reb_per36, ast_per36
-    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);
-    """
-
-    for r in rows:
-        ts, efg, p36, r36, a36 = compute_metrics(r)
-
-        values = [
-            r["PLAYER_ID"],
-            r["PLAYER_NAME"],
-            r["TEAM_ID"],
-            r["TEAM_ABBREVIATION"],
-            r["SEASON"],
-            safe_float(r.get("AGE")),
-
-            r.get("GP"),
-            r.get("W"),
-            r.get("L"),
-            safe_float(r.get("W_PCT")),
-            safe_float(r.get("MIN")),
+    rows = chain([first], rows)
 
-            safe_float(r.get("FGM")), safe_float(r.get("FGA")),
-            safe_float(r.get("FG3M")), safe_float(r.get("FG3A")),
-            safe_float(r.get("FTM")), safe_float(r.get("FTA")),
-
-            safe_float(r.get("OREB")), safe_float(r.get("DREB")), safe_float(r.get("REB")),
-            safe_float(r.get("AST")), safe_float(r.get("TOV")),
-            safe_float(r.get("STL")), safe_float(r.get("BLK")), safe_float(r.get("PF")),
-            safe_float(r.get("PTS")),
-            safe_float(r.get("PLUS_MINUS")),
-
-            ts, efg, p36, r36, a36
-        ]
+    create_player_season_stats(cur)
 
-        cur.execute(insert_sql, values)
+    # multi-row INSERTs: 500 rows x 32 columns stays under SQLite's 32766-variable limit
+    build_stats_frame(rows).to_sql(
+        "player_season_stats", cur.connection, if_exists="append", index=False,
+        method="multi", chunksize=500,
+    )
 
     # indexes
     cur.execute("CREATE INDEX IF NOT EXISTS idx_pss_player_name ON player_season_stats(player_name);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_pss_season ON player_season_stats(season);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_pss_team_abbrev ON player_season_stats(team_abbreviation);")
 
+    cur.connection.commit()
+
     n = cur.execute("SELECT COUNT(*) FROM player_season_stats;").fetchone()[0]
     print(f"✅ Rows inserted (player_season_stats): {n}")
 
@@ -210,9 +253,38 @@ def rebuild_players_from_stats(cur):
     print(f"✅ Rows inserted (players from stats): {n}")
 
 
+def read_missing_seasons_feather():
+    """Yield (player_name, seasons, missing_seasons) from the Feather file (native list columns)."""
+    tbl = feather.read_table(MISSING_FEATHER_PATH, columns=["PLAYER_NAME", "SEASONS", "MISSING_SEASONS"])
+    # zip whole columns instead of tbl.to_pylist(), which builds a dict per row
+    names, seasons, missing = (tbl.column(c).to_pylist() for c in tbl.column_names)
+    for name, seasons_list, missing_list in zip(names, seasons, missing):
+        yield (name or "").strip(), seasons_list or [], missing_list or []
+
+
+def read_missing_seasons_csv():
+    """Yield (player_name, seasons, missing_seasons) from the legacy CSV export."""
+    with MISSING_CSV_PATH.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        expected = {"PLAYER_NAME", "SEASONS", "MISSING_SEASONS"}
+        if not expected.issubset(set(reader.fieldnames or [])):
+            raise KeyError(f"Missing CSV columns. Need {expected}, got {reader.fieldnames}")
+
+        for row in reader:
+            yield (
+                (row.get("PLAYER_NAME") or "").strip(),
+                parse_listish_cell(row.get("SEASONS")),
+                parse_listish_cell(row.get("MISSING_SEASONS")),
+            )
+
+
 def load_player_missing_seasons(cur):
-    if not MISSING_CSV_PATH.exists():
-        print(f"⚠️ Missing CSV (skip): {MISSING_CSV_PATH}")
+    if feather is not None and MISSING_FEATHER_PATH.exists():
+        rows = read_missing_seasons_feather()
+    elif MISSING_CSV_PATH.exists():
+        rows = read_missing_seasons_csv()
+    else:
+        print(f"⚠️ Missing Feather/CSV (skip): {MISSING_FEATHER_PATH}")
         return 0
 
     cur.execute("""
@@ -222,25 +294,15 @@ def load_player_missing_seasons(cur):
         missing_seasons_json TEXT NOT NULL
     );
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_pms_player_name ON player_missing_seasons(player_name);")
 
-    inserted = 0
-    with MISSING_CSV_PATH.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        expected = {"PLAYER_NAME", "SEASONS", "MISSING_SEASONS"}
-        if not expected.issubset(set(reader.fieldnames or [])):
-            raise KeyError(f"Missing CSV columns. Need {expected}, got {reader.fieldnames}")
+    cur.execute("BEGIN;")
+    inserted = cur.connection.executemany(
+        MISSING_INSERT_SQL,
+        ((name, json_text(seasons), json_text(missing)) for name, seasons, missing in rows),
+    ).rowcount
 
-        for row in reader:
-            player_name = (row.get("PLAYER_NAME") or "").strip()
-            seasons_list = parse_listish_cell(row.get("SEASONS"))
-            missing_list = parse_listish_cell(row.get("MISSING_SEASONS"))
-
-            cur.execute(
-                "INSERT INTO player_missing_seasons (player_name, seasons_json, missing_seasons_json) VALUES (?,?,?);",
-                (player_name, json.dumps(seasons_list), json.dumps(missing_list))
-            )
-            inserted += 1
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_pms_player_name ON player_missing_seasons(player_name);")
+    cur.connection.commit()
 
     print(f"✅ Rows inserted (player_missing_seasons): {inserted}")
     return inserted
@@ -251,10 +313,12 @@ def load_draft_history(cur):
         print(f"⚠️ Missing JSON (skip): {DRAFT_JSON_PATH}")
         return 0
 
-    rows = json.loads(DRAFT_JSON_PATH.read_text())
-    if not rows:
+    rows = iter_json_records(DRAFT_JSON_PATH)
+    first = next(rows, None)
+    if first is None:
         print("⚠️ Draft JSON empty (skip).")
         return 0
+    rows = chain([first], rows)
 
     # minimal schema based on your screenshot
     cur.execute("""
@@ -276,37 +340,16 @@ def load_draft_history(cur):
     );
     """)
 
+    cur.execute("BEGIN;")
+    # Connection.executemany binds every row against the single prepared statement
+    inserted = cur.connection.executemany(
+        DRAFT_INSERT_SQL, (tuple(map(r.get, DRAFT_KEYS)) for r in rows)
+    ).rowcount
+
     cur.execute("CREATE INDEX IF NOT EXISTS idx_draft_player_name ON draft_history(player_name);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_draft_season ON draft_history(season);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_draft_overall_pick ON draft_history(overall_pick);")
-
-    insert_sql = """
-    INSERT INTO draft_history (
-        person_id, player_name, season, round_number, round_pick, overall_pick, draft_type,
-        team_id, team_city, team_name, team_abbreviation,
-        organization, organization_type, player_profile_flag
-    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?);
-    """
-
-    inserted = 0
-    for r in rows:
-        cur.execute(insert_sql, (
-            r.get("PERSON_ID"),
-            r.get("PLAYER_NAME"),
-            r.get("SEASON"),
-            r.get("ROUND_NUMBER"),
-            r.get("ROUND_PICK"),
-            r.get("OVERALL_PICK"),
-            r.get("DRAFT_TYPE"),
-            r.get("TEAM_ID"),
-            r.get("TEAM_CITY"),
-            r.get("TEAM_NAME"),
-            r.get("TEAM_ABBREVIATION"),
-            r.get("ORGANIZATION"),
-            r.get("ORGANIZATION_TYPE"),
-            r.get("PLAYER_PROFILE_FLAG"),
-        ))
-        inserted += 1
+    cur.connection.commit()
 
     print(f"✅ Rows inserted (draft_history): {inserted}")
     return inserted
@@ -323,7 +366,9 @@ def main():
 
     # speed + durability defaults for local analytics
     cur.execute("PRAGMA journal_mode=WAL;")
-    cur.execute("PRAGMA synchronous=NORMAL;")
+    cur.execute("PRAGMA synchronous=OFF;")  # bulk load only; restored to NORMAL below
+    cur.execute("PRAGMA temp_store=MEMORY;")
+    cur.execute("PRAGMA cache_size=-200000;")
 
     print(f"✅ DB created: {DB_PATH}")
 
@@ -333,13 +378,14 @@ def main():
     # 2) derive players from stats
     rebuild_players_from_stats(cur)
 
-    # 3) missing seasons table (csv -> json text in db)
+    # 3) missing seasons table (feather/csv -> json text in db)
     load_player_missing_seasons(cur)
 
     # 4) draft history table
     load_draft_history(cur)
 
     con.commit()
+    cur.execute("PRAGMA synchronous=NORMAL;")
 
     # ---- sanity samples ----
     sample_ts = cur.execute("""
@@ -1,62 +1,107 @@
-import json
 import sqlite3
+from itertools import chain
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson as _json
+except ImportError:  # stdlib fallback
+    import json as _json
+
+try:
+    import ijson
+except ImportError:  # load the whole file instead
+    ijson = None
+
 # ---------- paths ----------
 JSON_PATH = Path("data/nba_player_stats_2000_2025.json")
 DB_PATH = Path("data/nba_stats.db")
 
 
+# player_season_stats columns in insert order; REAL columns are coerced to float
+STATS_COLUMNS = [
+    "PLAYER_ID", "PLAYER_NAME", "TEAM_ID", "TEAM_ABBREVIATION", "SEASON", "AGE",
+    "GP", "W", "L", "W_PCT", "MIN",
+    "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA",
+    "OREB", "DREB", "REB", "AST", "TOV", "STL", "BLK", "PF", "PTS", "PLUS_MINUS",
+]
+# every stats record must carry the insert columns; checked once against the first record
+REQUIRED_KEYS = frozenset(STATS_COLUMNS)
+FLOAT_COLUMNS = [
+    "AGE", "W_PCT", "MIN",
+    "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA",
+    "OREB", "DREB", "REB", "AST", "TOV", "STL", "BLK", "PF", "PTS", "PLUS_MINUS",
+]
+
+
 # ---------- helpers ----------
-def safe_float(x):
-    """Convert to float; return None if missing/invalid (becomes NULL in SQLite)."""
-    try:
-        return float(x)
-    except (TypeError, ValueError):
-        return None
+def to_float(col):
+    """Convert a column to a float array; missing/invalid become NaN (NULL in SQLite)."""
+    return pd.to_numeric(col, errors="coerce").to_numpy(dtype=float)
 
 
-def compute_metrics(r):
+def compute_metrics(df):
     """
-    Compute:
+    Compute, vectorized over every row of df (stat columns already float, see to_float):
       eFG% = (FGM + 0.5*FG3M) / FGA
       TS%  = PTS / (2*(FGA + 0.44*FTA))
       per-36 for PTS/REB/AST = stat * 36 / MIN
+    Undefined results (zero denominators, missing inputs) are NaN.
     """
-    min_ = safe_float(r.get("MIN"))
-    pts = safe_float(r.get("PTS"))
-    reb = safe_float(r.get("REB"))
-    ast = safe_float(r.get("AST"))
-
-    fgm = safe_float(r.get("FGM"))
-    fga = safe_float(r.get("FGA"))
-    fg3m = safe_float(r.get("FG3M"))
-    fta = safe_float(r.get("FTA"))
-
-    # eFG%
-    efg = None
-    if fga is not None and fga > 0 and fgm is not None and fg3m is not None:
-        efg = (fgm + 0.5 * fg3m) / fga
-
-    # TS%
-    ts = None
-    if pts is not None and fga is not None and fta is not None:
+    min_ = df["MIN"].to_numpy()
+    pts = df["PTS"].to_numpy()
+    reb = df["REB"].to_numpy()
+    ast = df["AST"].to_numpy()
+
+    fgm = df["FGM"].to_numpy()
+    fga = df["FGA"].to_numpy()
+    fg3m = df["FG3M"].to_numpy()
+    fta = df["FTA"].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # eFG%
+        efg = np.where(fga > 0, (fgm + 0.5 * fg3m) / fga, np.nan)
+
+        # TS%
         denom = 2 * (fga + 0.44 * fta)
-        if denom > 0:
-            ts = pts / denom
+        ts = np.where(denom > 0, pts / denom, np.nan)
+
+        # per-36
+        factor = np.where(min_ > 0, 36.0 / min_, np.nan)
+
+    return ts, efg, pts * factor, reb * factor, ast * factor
+
+
+def iter_json_records(path):
+    """Yield the objects of a top-level JSON array; streams with ijson when installed."""
+    if ijson is None:
+        yield from _json.loads(path.read_bytes())
+        return
+    with path.open("rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
 
-    # per-36
-    pts_36 = reb_36 = ast_36 = None
-    if min_ is not None and min_ > 0:
-        factor = 36.0 / min_
-        if pts is not None:
-            pts_36 = pts * factor
-        if reb is not None:
-            reb_36 = reb * factor
-        if ast is not None:
-            ast_36 = ast * factor
+def build_stats_frame(rows):
+    """Shape the raw JSON rows into player_season_stats columns (NaN stays NaN; to_sql writes NULL)."""
+    # keep only the insert columns of each record as it streams in
+    out = pd.DataFrame.from_records(
+        (tuple(r.get(k) for k in STATS_COLUMNS) for r in rows), columns=STATS_COLUMNS
+    )
+    # coerce each stat column once; the metrics reuse the same arrays
+    for col in FLOAT_COLUMNS:
+        out[col] = to_float(out[col])
+    ts, efg, p36, r36, a36 = compute_metrics(out)
 
-    return ts, efg, pts_36, reb_36, ast_36
+    out["TS_PCT"] = ts
+    out["EFG_PCT"] = efg
+    out["PTS_PER36"] = p36
+    out["REB_PER36"] = r36
+    out["AST_PER36"] = a36
+
+    out.columns = out.columns.str.lower()
+    return out
 
 
 # ---------- main ----------
@@ -64,20 +109,16 @@ def main():
     if not JSON_PATH.exists():
         raise FileNotFoundError(f"Missing input JSON: {JSON_PATH}")
 
-    rows = json.loads(JSON_PATH.read_text())
-    if not rows:
+    rows = iter_json_records(JSON_PATH)
+    first = next(rows, None)
+    if first is None:
         raise ValueError("JSON file is empty.")
 
     # --- schema validation (prevents silent bugs) ---
-    required_keys = {
-        "PLAYER_ID", "PLAYER_NAME", "TEAM_ID", "TEAM_ABBREVIATION", "SEASON",
-        "AGE", "GP", "MIN", "W", "L", "W_PCT",
-        "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA",
-        "OREB", "DREB", "REB", "AST", "TOV", "STL", "BLK", "PF", "PTS", "PLUS_MINUS",
-    }
-    missing = required_keys - set(rows[0].keys())
+    missing = REQUIRED_KEYS.difference(first)
     if missing:
         raise KeyError(f"JSON missing required keys: {sorted(missing)}")
+    rows = chain([first], rows)
 
     # recreate db file
     if DB_PATH.exists():
@@ -88,7 +129,9 @@ def main():
 
     # speed + durability defaults for local analytics
     cur.execute("PRAGMA journal_mode=WAL;")
-    cur.execute("PRAGMA synchronous=NORMAL;")
+    cur.execute("PRAGMA synchronous=OFF;")  # bulk load only; restored to NORMAL below
+    cur.execute("PRAGMA temp_store=MEMORY;")
+    cur.execute("PRAGMA cache_size=-200000;")
 
     # create table
     cur.execute("""
@@ -123,59 +166,22 @@ def main():
         ast_per36 REAL,
         
         PRIMARY KEY (player_id, season)
-    );
+    ) WITHOUT ROWID;
     """)
 #add stl & blk to per_36 calculations later
-    insert_sql = """
-    INSERT INTO player_season_stats (
-        player_id, player_name, team_id, team_abbreviation, season, age,
-        gp, w, l, w_pct, min,
-        fgm, fga, fg3m, fg3a, ftm, fta,
-        oreb, dreb, reb, ast, tov, stl, blk, pf, pts, plus_minus,
-        ts_pct, efg_pct, pts_per36, reb_per36, ast_per36
-    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);
-    """
-
-    # insert rows
-    for r in rows:
-        ts, efg, p36, r36, a36 = compute_metrics(r)
-
-        values = [
-            r["PLAYER_ID"],
-            r["PLAYER_NAME"],
-            r["TEAM_ID"],
-            r["TEAM_ABBREVIATION"],
-            r["SEASON"],
-            safe_float(r.get("AGE")),
-
-            r.get("GP"),
-            r.get("W"),
-            r.get("L"),
-            safe_float(r.get("W_PCT")),
-            safe_float(r.get("MIN")),
-
-            safe_float(r.get("FGM")), safe_float(r.get("FGA")),
-            safe_float(r.get("FG3M")), safe_float(r.get("FG3A")),
-            safe_float(r.get("FTM")), safe_float(r.get("FTA")),
-
-            safe_float(r.get("OREB")), safe_float(r.get("DREB")), safe_float(r.get("REB")),
-            safe_float(r.get("AST")), safe_float(r.get("TOV")),
-            safe_float(r.get("STL")), safe_float(r.get("BLK")), safe_float(r.get("PF")),
-            safe_float(r.get("PTS")),
-            safe_float(r.get("PLUS_MINUS")),
-
-            ts, efg, p36, r36, a36
-        ]
-
-        cur.execute(insert_sql, values)
-
-    con.commit()
+    # insert rows: to_sql runs all chunks in one transaction, and
+    # 500 rows x 32 columns stays under SQLite's 32766-variable limit
+    build_stats_frame(rows).to_sql(
+        "player_season_stats", con, if_exists="append", index=False,
+        method="multi", chunksize=500,
+    )
 
     # indexes (makes Step 5 retrieval faster)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_player_name ON player_season_stats(player_name);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_season ON player_season_stats(season);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_team_abbrev ON player_season_stats(team_abbreviation);")
     con.commit()
+    cur.execute("PRAGMA synchronous=NORMAL;")
 
     # sanity checks
     n = cur.execute("SELECT COUNT(*) FROM player_season_stats;").fetchone()[0]
@@ -1,117 +1,240 @@
 from fileinput import filename
-import json
+import numpy as np
 import pandas as pd
 import time
+from datetime import date
+import logging
 import os
+import random
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 import nba_api
 from nba_api.stats.static import players
 from nba_api.stats.endpoints import leaguedashplayerstats
+from nba_api.stats.library.http import NBAStatsHTTP
+import requests
+logger = logging.getLogger(__name__)
+try:
+    import orjson as _json
+except ImportError:  # stdlib fallback
+    import json as _json
+CACHE_MAX_AGE = 24 * 60 * 60  # seconds before an in-progress season is refetched
+PLAYERS_MAX_AGE = 24 * 60 * 60  # seconds before all_nba_players.json is rewritten
+EXCLUDED_COLUMNS = "RANK|WNBA_FANTASY_PTS|TEAM_COUNT"  # dropped at fetch time, never checked for missing values
+# transient network failures worth retrying (nba_api surfaces requests' exceptions)
+RETRYABLE_ERRORS = (TimeoutError, ConnectionError, requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+REQUEST_INTERVAL = 1.0  # seconds between API requests, shared by all fetch threads
+_rate_lock = threading.Lock()
+_next_request_at = 0.0
+def dump_json(obj, filename):
+    # orjson only supports 2-space indentation
+    if _json.__name__ == "orjson":
+        data = _json.dumps(obj, option=_json.OPT_INDENT_2)
+    else:
+        data = _json.dumps(obj, indent=2).encode()
+    with open(filename, 'wb') as f:
+        f.write(data)
+def _wait_for_rate_limit():
+    # global limiter: threads reserve the next free slot, then sleep outside the lock
+    global _next_request_at
+    with _rate_lock:
+        now = time.monotonic()
+        slot = max(now, _next_request_at)
+        _next_request_at = slot + REQUEST_INTERVAL
+    time.sleep(slot - now)
+def _cache_is_fresh(cache_file, season):
+    if not os.path.exists(cache_file):
+        return False
+    # a season is final once its playoffs are over (July of the end year); a file fetched
+    # after that point never changes, but one fetched mid-season still ages out normally
+    fetched_at = os.path.getmtime(cache_file)
+    if fetched_at >= time.mktime(date(int(season[:4]) + 1, 7, 1).timetuple()):
+        return True
+    return time.time() - fetched_at < CACHE_MAX_AGE
+def _fetch_one_season(season, path="data", retries=4):
+    # raw API responses are cached per season so re-runs skip the network
+    cache_file = os.path.join(path, "raw", f"{season}.json")
+    if _cache_is_fresh(cache_file, season):
+        with open(cache_file, 'rb') as f:
+            result = _json.loads(f.read())
+    else:
+        for attempt in range(retries + 1):
+            _wait_for_rate_limit()  # To respect API rate limits
+            try:
+                logger.info("Fetching data for season %s", season)
+                endpoint = leaguedashplayerstats.LeagueDashPlayerStats(
+                    season=season,
+                    per_mode_detailed="PerGame",
+                    timeout = 100,
+                    get_request=False
+                )
+                # send the request ourselves: the endpoint would json.loads the body and build
+                # DataSets we never use, so the raw body is parsed exactly once, with orjson
+                response = NBAStatsHTTP().send_api_request(
+                    endpoint=endpoint.endpoint,
+                    parameters=endpoint.parameters,
+                    proxy=endpoint.proxy,
+                    headers=endpoint.headers,
+                    timeout=endpoint.timeout,
+                )
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == retries:
+                    raise
+                if attempt >= 1:
+                    # repeated failures: drop the pooled connections nba_api keeps reusing
+                    NBAStatsHTTP.set_session(None)
+                # exponential backoff with jitter instead of dropping the season
+                wait = 5 * 2 ** attempt + random.random()
+                logger.warning("%s for season %s, retrying in %.1fs...", type(e).__name__, season, wait)
+                time.sleep(wait)
+        result = _json.loads(response.get_response())["resultSets"][0]
+        # the raw body and the requests response behind it are not needed past this point;
+        # free them now rather than while the cache file and the frame are being built
+        del response
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        # compact bytes to a temp file, then swap it in: an interrupted write must never
+        # leave a truncated file that later runs would trust as the cached season
+        data = _json.dumps(result)
+        with open(cache_file + ".tmp", 'wb') as f:
+            f.write(data if isinstance(data, bytes) else data.encode())
+        os.replace(cache_file + ".tmp", cache_file)
+    # build the frame column-wise from rowSet instead of one dict per row
+    season_df = pd.DataFrame(result["rowSet"], columns=result["headers"])
+    del result  # the row lists are copied into the frame's blocks; drop them before the column slice
+    # rank/fantasy columns are never used downstream; drop them before they reach any output
+    season_df = season_df.loc[:, ~season_df.columns.str.contains(EXCLUDED_COLUMNS, regex=True)]
+    season_df["SEASON"] = season
+    return season_df
 def fetch_nba_player_stats(path="data"):
     seasons = [f"{year}-{str(year+1)[-2:]}" for year in range(2000, 2025)]
-    all_rows = []
-    for season in seasons:
-        try: 
-            print(f"Fetching data for season {season}")
-            response = leaguedashplayerstats.LeagueDashPlayerStats(
-                season=season,
-                per_mode_detailed="PerGame",
-                timeout = 100
-            )
-        except TimeoutError:
-            print(f"TimeoutError for season {season}, retrying...")
-            time.sleep(5)
-            continue
-        result = response.get_dict()["resultSets"][0]
-        headers = result["headers"]
-        rows = result["rowSet"]
-
-        for row in rows:
-            record = dict(zip(headers, row))
-            record["SEASON"] = season
-            all_rows.append(record)
-        time.sleep(1)  # To respect API rate limits
-
-    # Convert everything to one DataFrame
-    df = pd.DataFrame(all_rows)
+    # requests are I/O bound, so a few threads overlap the network waits
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        # Combine the per-season frames (in season order) into one DataFrame as they complete
+        df = pd.concat(executor.map(lambda season: _fetch_one_season(season, path=path), seasons), ignore_index=True)
     df = standardize_player_names(df)
-    df.to_csv(os.path.join(path, "nba_player_stats_2000_2025.csv"), index=False)
+    # highly repeated labels: integer codes instead of one Python str per cell
+    for col in ("PLAYER_NAME", "TEAM_ABBREVIATION", "SEASON"):
+        df[col] = df[col].astype("category")
+    # typed, compressed columnar copy for the pandas steps; the JSON feeds build_db/build2_db.
+    # Written once after the concat so every column's type is unified across all seasons
+    df.to_parquet(os.path.join(path, "nba_player_stats_2000_2025.parquet"), engine="pyarrow", compression="zstd")
     df.to_json(os.path.join(path, "nba_player_stats_2000_2025.json"), orient="records")
+    return df
 
 def detect_anomalies(df, path = "data"):
     # Example anomaly detection: Check for missing values in key columns
-    key_columns = []
-    key_columns.extend(col for col in df.columns if "RANK" not in col and "WNBA_FANTASY_PTS" not in col and "TEAM_COUNT" not in col)
-    anomalies = df[key_columns].isnull().sum()
-    print(f"Anomalies detected (missing values):{anomalies}")
+    # select the columns both passes need once, so the null count and the season keys
+    # read the same subset instead of scanning the full frame and then copying it
+    work = df.loc[:, ~df.columns.str.contains(EXCLUDED_COLUMNS, regex=True)]
+    anomalies = work.isna().sum()
+    # report only the columns that actually have gaps; skips rendering the full Series repr
+    logger.info("Anomalies detected (missing values): %s", anomalies[anomalies > 0].to_dict())
     #Detect missing seasons for individual players
-    grouped = df.groupby("PLAYER_NAME")["SEASON"].apply(set)
-    missing_seasons_map = {}
-
-    for player_name, seasons in grouped.items():
-        start, end = min(seasons), max(seasons)
-        start = int(start.split("-")[0]) + 1
-        end = int(end.split("-")[0]) + 1
-
-        missing_seasons = set(range(start, end + 1)) - {
-            int(s.split("-")[0]) + 1 for s in seasons
-        }
-
-        missing_seasons_to_str = sorted(
-            f"{year-1}-{str(year)[-2:]}" for year in missing_seasons
-        )
-
-        missing_seasons_map[player_name] = missing_seasons_to_str
-    grouped_df = grouped.reset_index()
-    grouped_df.columns = ["PLAYER_NAME", "SEASONS"]
-    grouped_df["SEASONS"] = grouped_df["SEASONS"].apply(lambda x: sorted(x))
-    grouped_df["MISSING_SEASONS"] = grouped_df["PLAYER_NAME"].map(missing_seasons_map)
-    grouped_df.to_csv(os.path.join(path, "nba_player_missing_seasons.csv"), index=False)
-    print("Missing seasons per player saved to nba_player_missing_seasons.csv")
+    # categorical keys let the set difference work on integer codes; only the two key
+    # columns are converted, the rest of the frame is never copied
+    names = work["PLAYER_NAME"].astype("category")
+    season = work["SEASON"].astype("category")
+    out_file = os.path.join(path, "nba_player_missing_seasons.feather")
+    # rows missing a name or a season carry code -1, which would index the last row of the
+    # matrix below; leave them out, as a groupby on the two columns would
+    codes = names.cat.codes.to_numpy()
+    season_codes = season.cat.codes.to_numpy()
+    valid = (codes >= 0) & (season_codes >= 0)
+    if not valid.any():
+        pd.DataFrame({"PLAYER_NAME": [], "SEASONS": [], "MISSING_SEASONS": []}).to_feather(out_file)
+        logger.info("No player seasons to check; wrote empty nba_player_missing_seasons.feather")
+        return
+    codes = codes[valid]
+    # parse each distinct season label once and broadcast through the codes
+    season_years = season.cat.categories.str.slice(0, 4).astype(np.int16).to_numpy()
+    years = season_years[season_codes[valid]]
+    # dense players x years presence matrix: with ~25 candidate years it stays well under
+    # a megabyte, and every set operation below becomes an elementwise boolean op
+    first_year = int(years.min())
+    present = np.zeros((len(names.cat.categories), int(years.max()) - first_year + 1), dtype=bool)
+    present[codes, years - first_year] = True
+    player_codes = np.flatnonzero(present.any(axis=1))
+    present = present[player_codes]
+    # a player's active range runs from their first to their last season with a row
+    year_index = np.arange(present.shape[1])
+    first = present.argmax(axis=1)
+    last = present.shape[1] - 1 - present[:, ::-1].argmax(axis=1)
+    active = (year_index >= first[:, None]) & (year_index <= last[:, None])
+    absent = active & ~present
+    # season label per year, built once: 2011 -> "2011-12"
+    labels = np.array([f"{y}-{str(y+1)[-2:]}" for y in range(first_year, first_year + present.shape[1])], dtype=object)
+    # nonzero walks the matrix row-major, so each player's years come out grouped and sorted
+    seasons = np.split(labels[np.nonzero(present)[1]], np.cumsum(present.sum(axis=1))[:-1])
+    missing = np.split(labels[np.nonzero(absent)[1]], np.cumsum(absent.sum(axis=1))[:-1])
+    grouped_df = pd.DataFrame({
+        "PLAYER_NAME": names.cat.categories.take(player_codes),
+        "SEASONS": [s.tolist() for s in seasons],
+        "MISSING_SEASONS": [m.tolist() for m in missing],
+    })
+    # Feather keeps the season lists as typed list<string> columns, no text parsing on reload
+    grouped_df.to_feather(out_file)
+    logger.info("Missing seasons per player saved to nba_player_missing_seasons.feather")
+_COMBINING_MARKS = str.maketrans("", "", "".join(chr(c) for c in range(0x300, 0x370)))
+def _to_ascii(name):
+    # NFKD splits accents into combining marks, which translate() deletes in one C pass;
+    # only names still holding other non-ASCII letters pay for the encode/decode round-trip
+    name = unicodedata.normalize('NFKD', name).translate(_COMBINING_MARKS)
+    return name if name.isascii() else name.encode('ascii', errors='ignore').decode('utf-8')
 def standardize_player_names(df):
     # Remove special characters from player names
     # Example: Luka Dončić -> Luka Doncic
-    df["PLAYER_NAME"] = df["PLAYER_NAME"].str.normalize('NFKD').str.encode('ascii', errors='ignore').str.decode('utf-8')
+    # names repeat across seasons, so normalize each distinct name once;
+    # the factorize codes then index straight into the result (-1, a missing name, stays missing)
+    codes, uniques = pd.factorize(df["PLAYER_NAME"])
+    normalized = pd.Series([_to_ascii(name) for name in uniques], dtype=object)
+    df["PLAYER_NAME"] = normalized.reindex(codes).to_numpy()
     return df
 def all_nba_players(path="data"):
+    filename = os.path.join(path, "all_nba_players.json")
+    # the static player list rarely changes; skip the rebuild if written recently
+    if os.path.exists(filename) and time.time() - os.path.getmtime(filename) < PLAYERS_MAX_AGE:
+        logger.info("Using recent %s", filename)
+        return
     player_dict = players.get_players() #properties: id, full_name, first_name, last_name, is_active
     #Only pull from players that played from 2000-2025
     filtered_player_dict = []
-    filename = os.path.join(path, "all_nba_players.json")
     try:
-        with open(filename, 'w') as json_file:
-            json.dump(player_dict, json_file, indent=4)
-        print(f"Successfully wrote data to {filename}")
+        dump_json(player_dict, filename)
+        logger.info("Successfully wrote data to %s", filename)
     except IOError as e:
-        print(f"Error writing to file {filename}: {e}")
+        logger.error("Error writing to file %s: %s", filename, e)
 def load_players_from_json(filename):
-    with open(filename, 'r') as f:
-        return json.load(f)
+    with open(filename, 'rb') as f:
+        return _json.loads(f.read())
 def popper(df, target_col, target_name, target_location):
         target_col = df.pop(target_name)
         df.insert(target_location, target_name, target_col)
         return df
 def fetch_current_nba_players(path="data"):
-    df = pd.read_json(os.path.join(path, "nba_player_stats_2000_2025.json"))
-    modern_players = df["PLAYER_NAME"].unique().tolist()
+    # only the names are needed, so read just that Parquet column; a set makes the filter O(1) per player
+    names = pd.read_parquet(os.path.join(path, "nba_player_stats_2000_2025.parquet"), columns=["PLAYER_NAME"])
+    modern_players = set(names["PLAYER_NAME"].unique())
     all_players = load_players_from_json(os.path.join(path, "all_nba_players.json"))
     modern_player_dict = [p for p in all_players if p["full_name"] in modern_players]
-    with open(os.path.join(path, "modern_nba_players.json"), 'w') as f:
-        json.dump(modern_player_dict, f, indent=4)
+    dump_json(modern_player_dict, os.path.join(path, "modern_nba_players.json"))
 def per_36(file, path = "data"):
     df = pd.read_json(file)
     select_columns = ["PTS", "AST", "REB", "STL", "BLK", "TOV", 'FGM', 'FGA', 'FG_PCT', 'FG3M',
        'FG3A', 'FTM', 'FTA', 'OREB', 'DREB', 'PF', 'BLKA']
-    for col in select_columns:
-        if df["MIN"] != 0:
-            df[col] = (df[col] / df["MIN"]) * 36 
+    # one broadcast multiply; seasons with 0 minutes have no per-36 rate (NaN)
+    factor = 36.0 / df["MIN"].replace(0, np.nan)
+    df[select_columns] = df[select_columns].mul(factor, axis=0)
     df.to_json(os.path.join(os.path.dirname(file), "nba_player_stats_2000_2025_per_36.json"), orient="records")
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     folder = "data"
     path = os.path.join(os.getcwd(), folder)
     if not os.path.exists(path):
         os.makedirs(path)
-    fetch_nba_player_stats()
-    df = pd.read_csv(os.path.join(path, "nba_player_stats_2000_2025.csv"))
+    # keep the fetched frame in memory rather than re-reading the CSV just written
+    df = fetch_nba_player_stats(path=path)
     #per_36(os.path.join(path, "nba_player_stats_2000_2025.json"), path=path)
     detect_anomalies(df, path=path)
     all_nba_players(path=path)